@@ -6,4 +6,8 @@ import { fileURLToPath } from "url";
 const __dirname = dirname(fileURLToPath(import.meta.url));
 const plannerPath = join(__dirname, "..", "src", "planner.ts");
 
-spawn("npx", ["tsx", plannerPath], { stdio: "inherit" }).on("exit", process.exit);
+// Run node with the tsx loader directly rather than via `npx tsx`, which
+// resolves the package through npm and then spawns a second node process.
+const tsxLoader = import.meta.resolve("tsx");
+
+spawn(process.execPath, ["--import", tsxLoader, plannerPath], { stdio: "inherit" }).on("exit", process.exit);
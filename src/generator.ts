@@ -1,7 +1,7 @@
-import { query } from "@anthropic-ai/claude-agent-sdk";
 import { execSync } from "child_process";
 import { existsSync, readdirSync, readFileSync } from "fs";
-import { trackQuery } from "./utils/query-tracker";
+import { AGENT_QUERY_OPTIONS } from "./utils/agent-options";
+import { logAssistantText, logTotalCost, trackQuery } from "./utils/query-tracker";
 
 /**
  * Initialize Playwright agents if they don't exist.
@@ -34,7 +34,10 @@ function getTestPlan(): string | null {
     return null;
   }
 
-  const files = readdirSync("specs").filter((f) => f.endsWith(".md") && f !== "README.md");
+  // Sort so the chosen plan doesn't depend on filesystem listing order
+  const files = readdirSync("specs")
+    .filter((f) => f.endsWith(".md") && f !== "README.md")
+    .sort();
 
   if (files.length === 0) {
     console.log("No test plan found in specs/ directory. Run planner first.");
@@ -60,6 +63,10 @@ async function generateTest(): Promise<void> {
   console.log("Test plan loaded");
   console.log("\nGenerating test for highest priority case...\n");
 
+  // Load the SDK only once we know there is work to do, so the early-exit
+  // paths above don't pay for importing it.
+  const { query } = await import("@anthropic-ai/claude-agent-sdk");
+
   // IMPORTANT: Do NOT explicitly invoke the agent via Task tool.
   // The playwright-test-generator agent is a local .claude/agents/ file created by Playwright,
   // not a built-in Claude Code subagent. The Task tool only knows about built-in subagent types
@@ -83,48 +90,23 @@ CRITICAL INSTRUCTIONS:
 6. Follow the test plan's structure and expectations exactly
 
 Generate the single most important test and stop.`,
-    options: {
-      maxTurns: 50,
-      cwd: process.cwd(),
-      model: "haiku",
-      maxBudgetUsd: parseFloat(process.env.PLAYMAKER_MAX_BUDGET || "1.0"),
-      allowedTools: [
-        "Task",
-        "Bash",
-        "Glob",
-        "Grep",
-        "Read",
-        "Edit",
-        "MultiEdit",
-        "Write",
-        "WebFetch",
-        "WebSearch",
-        "TodoWrite",
-      ],
-    },
+    options: AGENT_QUERY_OPTIONS,
   });
 
-  const { totalCost, stepCount } = await trackQuery(q, {
-    onAssistantMessage: (message) => {
-      const textContent = message.message.content.find(
-        (c: unknown) => (c as { type: string }).type === "text"
-      );
-      if (textContent && "text" in (textContent as { text?: string })) {
-        console.log((textContent as { text: string }).text);
-      }
-    }
-  });
+  const result = await trackQuery(q, { onAssistantMessage: logAssistantText });
 
   // Verify test file was created
-  if (existsSync("e2e") && readdirSync("e2e").some(f => f.endsWith(".spec.ts"))) {
+  const created = existsSync("e2e") && readdirSync("e2e").some(f => f.endsWith(".spec.ts"));
+  if (created) {
     console.log("\n✓ Test generated in e2e/ directory");
   } else {
     console.error("\n⚠️  No test file found in e2e/ directory");
-    console.log(`\n💰 Total cost: $${totalCost.toFixed(4)} (${stepCount} steps)`);
-    process.exit(1);
   }
 
-  console.log(`\n💰 Total cost: $${totalCost.toFixed(4)} (${stepCount} steps)`);
+  logTotalCost(result);
+  if (!created) {
+    process.exit(1);
+  }
 }
 
 generateTest().catch((error) => {
@@ -1,7 +1,13 @@
-import { query } from "@anthropic-ai/claude-agent-sdk";
-import { execSync } from "child_process";
+import { execFile, execSync, spawn } from "child_process";
 import { existsSync, readdirSync, readFileSync } from "fs";
-import { trackQuery } from "./utils/query-tracker";
+import { promisify } from "util";
+import { AGENT_QUERY_OPTIONS } from "./utils/agent-options";
+import { logAssistantText, logTotalCost, trackQuery } from "./utils/query-tracker";
+
+const execFileAsync = promisify(execFile);
+
+// Limit on how much of the PR diff is passed to the planner
+const MAX_DIFF_CHARS = 50000;
 
 interface PRInfo {
   number: number;
@@ -21,45 +27,67 @@ function ensureAgents(): void {
   }
 }
 
+type PRRefs = { base: { sha: string }; head: { sha: string } };
+
 /**
- * Get PR information from GitHub Actions event payload.
- * No API calls needed - GitHub provides full PR data in the event file.
+ * Get the PR diff using git (base and head SHAs are in the event).
+ * Output is streamed and git is stopped once MAX_DIFF_CHARS have been read,
+ * so large diffs are never fully buffered.
  */
-function getPRInfo(): PRInfo | null {
-  const eventPath = process.env.GITHUB_EVENT_PATH;
-
-  if (!eventPath) {
-    console.log("GITHUB_EVENT_PATH not found.");
-    return null;
-  }
-
-  const event = JSON.parse(readFileSync(eventPath, "utf-8"));
-  const pr = event.pull_request;
-
-  if (!pr) {
-    console.log("No pull_request in event payload.");
-    return null;
-  }
-
-  console.log(`Reading PR #${pr.number}: ${pr.title}`);
-
-  // Get diff using git (base and head SHAs are in the event)
-  let diff = "";
-  try {
-    const baseSha = pr.base.sha;
-    const headSha = pr.head.sha;
-    diff = execSync(`git diff ${baseSha}...${headSha}`, { encoding: "utf-8", maxBuffer: 10 * 1024 * 1024 });
-  } catch (error) {
-    console.log("Could not get diff via git, continuing without it.");
-  }
+function getDiff(pr: PRRefs): Promise<string> {
+  return new Promise((resolve) => {
+    const chunks: string[] = [];
+    let length = 0;
+    let settled = false;
+
+    const finish = (diff: string) => {
+      if (!settled) {
+        settled = true;
+        resolve(diff);
+      }
+    };
+    const fail = () => {
+      if (!settled) {
+        console.log("Could not get diff via git, continuing without it.");
+      }
+      finish("");
+    };
+
+    // Failures to start git arrive via the 'error' event; git's own errors go to our stderr
+    const child = spawn("git", ["diff", `${pr.base.sha}...${pr.head.sha}`], { stdio: ["ignore", "pipe", "inherit"] });
+
+    child.stdout!.setEncoding("utf-8");
+    child.stdout!.on("data", (chunk: string) => {
+      if (settled) return;
+      chunks.push(chunk);
+      length += chunk.length;
+      if (length >= MAX_DIFF_CHARS) {
+        child.kill();
+        finish(chunks.join("").slice(0, MAX_DIFF_CHARS));
+      }
+    });
+    child.on("error", fail);
+    child.on("close", (code) => {
+      if (code === 0) {
+        finish(chunks.join(""));
+      } else {
+        fail();
+      }
+    });
+  });
+}
 
-  // Get changed files from git
-  let files: PRInfo["files"] = [];
+/**
+ * Get changed files from git.
+ */
+async function getChangedFiles(pr: PRRefs): Promise<PRInfo["files"]> {
   try {
     const baseSha = pr.base.sha;
     const headSha = pr.head.sha;
-    const numstat = execSync(`git diff --numstat ${baseSha}...${headSha}`, { encoding: "utf-8" });
-    files = numstat
+    const { stdout: numstat } = await execFileAsync("git", ["diff", "--numstat", `${baseSha}...${headSha}`], {
+      encoding: "utf-8",
+    });
+    return numstat
       .trim()
       .split("\n")
       .filter((line) => line)
@@ -73,15 +101,44 @@ function getPRInfo(): PRInfo | null {
         };
       });
   } catch (error) {
+    const { stderr, message } = error as { stderr?: string; message?: string };
     console.log("Could not get file stats via git, continuing without them.");
+    console.error((stderr || message || "").trim());
+    return [];
+  }
+}
+
+/**
+ * Get PR information from GitHub Actions event payload.
+ * No API calls needed - GitHub provides full PR data in the event file.
+ */
+async function getPRInfo(): Promise<PRInfo | null> {
+  const eventPath = process.env.GITHUB_EVENT_PATH;
+
+  if (!eventPath) {
+    console.log("GITHUB_EVENT_PATH not found.");
+    return null;
+  }
+
+  const event = JSON.parse(readFileSync(eventPath, "utf-8"));
+  const pr = event.pull_request;
+
+  if (!pr) {
+    console.log("No pull_request in event payload.");
+    return null;
   }
 
+  console.log(`Reading PR #${pr.number}: ${pr.title}`);
+
+  // The diff and the file stats are independent git calls, so run them concurrently
+  const [diff, files] = await Promise.all([getDiff(pr), getChangedFiles(pr)]);
+
   return {
     number: pr.number,
     title: pr.title,
     body: pr.body,
     files,
-    diff: diff.slice(0, 50000), // Limit diff size
+    diff,
   };
 }
 
@@ -111,19 +168,19 @@ ${prInfo.diff}
  * Get change summary from GitHub PR.
  * Returns null if not running in a PR context.
  */
-function getChangeSummary(): string | null {
+async function getChangeSummary(): Promise<string | null> {
   // Allow mock data only if explicitly enabled for testing
   if (process.env.PLAYMAKER_MOCK) {
     console.log("Using mock data (PLAYMAKER_MOCK=true)");
     return "A search bar has been added to the homepage that allows users to search for products.";
   }
 
-  const prInfo = getPRInfo();
+  const prInfo = await getPRInfo();
   return prInfo ? formatPRSummary(prInfo) : null;
 }
 
 async function createTestPlan(): Promise<void> {
-  const changeSummary = getChangeSummary();
+  const changeSummary = await getChangeSummary();
 
   if (!changeSummary) {
     console.log("No PR data available. Playmaker only runs on pull_request events.");
@@ -137,6 +194,10 @@ async function createTestPlan(): Promise<void> {
   console.log(changeSummary.slice(0, 500) + (changeSummary.length > 500 ? "..." : ""));
   console.log("\nCreating test plan...\n");
 
+  // Load the SDK only once we know there is work to do, so the early-exit
+  // paths above don't pay for importing it.
+  const { query } = await import("@anthropic-ai/claude-agent-sdk");
+
   const q = query({
     prompt: `Use the playwright-test-planner agent to create a test plan and SAVE it to specs/ directory.
 
@@ -144,48 +205,23 @@ async function createTestPlan(): Promise<void> {
 ${changeSummary}
 
 IMPORTANT: The plan must be saved to a markdown file in the specs/ directory using the Write tool.`,
-    options: {
-      maxTurns: 50,
-      cwd: process.cwd(),
-      model: "haiku",
-      maxBudgetUsd: parseFloat(process.env.PLAYMAKER_MAX_BUDGET || "1.0"),
-      allowedTools: [
-        "Task",
-        "Bash",
-        "Glob",
-        "Grep",
-        "Read",
-        "Edit",
-        "MultiEdit",
-        "Write",
-        "WebFetch",
-        "WebSearch",
-        "TodoWrite",
-      ],
-    },
+    options: AGENT_QUERY_OPTIONS,
   });
 
-  const { totalCost, stepCount } = await trackQuery(q, {
-    onAssistantMessage: (message) => {
-      const textContent = message.message.content.find(
-        (c: unknown) => (c as { type: string }).type === "text"
-      );
-      if (textContent && "text" in (textContent as { text?: string })) {
-        console.log((textContent as { text: string }).text);
-      }
-    }
-  });
+  const result = await trackQuery(q, { onAssistantMessage: logAssistantText });
 
   // Verify test plan was created
-  if (existsSync("specs") && readdirSync("specs").some(f => f.endsWith(".md") && f !== "README.md")) {
+  const created = existsSync("specs") && readdirSync("specs").some(f => f.endsWith(".md") && f !== "README.md");
+  if (created) {
     console.log("\n✓ Test plan created in specs/ directory");
   } else {
     console.error("\n⚠️  No test plan found in specs/ directory");
-    console.log(`\n💰 Total cost: $${totalCost.toFixed(4)} (${stepCount} steps)`);
-    process.exit(1);
   }
 
-  console.log(`\n💰 Total cost: $${totalCost.toFixed(4)} (${stepCount} steps)`);
+  logTotalCost(result);
+  if (!created) {
+    process.exit(1);
+  }
 }
 
 createTestPlan().catch((error) => {
@@ -0,0 +1,29 @@
+/**
+ * Shared Claude Agent SDK query options for the Playwright agent scripts.
+ */
+
+import type { Options } from "@anthropic-ai/claude-agent-sdk";
+
+/**
+ * Query options used by every Playmaker agent run.
+ * None of these depend on the prompt, so they are built once at module load.
+ */
+export const AGENT_QUERY_OPTIONS: Options = {
+  maxTurns: 50,
+  cwd: process.cwd(),
+  model: "haiku",
+  maxBudgetUsd: parseFloat(process.env.PLAYMAKER_MAX_BUDGET || "1.0"),
+  allowedTools: [
+    "Task",
+    "Bash",
+    "Glob",
+    "Grep",
+    "Read",
+    "Edit",
+    "MultiEdit",
+    "Write",
+    "WebFetch",
+    "WebSearch",
+    "TodoWrite",
+  ],
+};
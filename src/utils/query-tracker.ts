@@ -2,7 +2,7 @@
  * Utility for tracking costs and processing messages from Claude Agent SDK query streams.
  */
 
-interface QueryTrackerResult {
+export interface QueryTrackerResult {
   totalCost: number;
   stepCount: number;
 }
@@ -62,3 +62,27 @@ export async function trackQuery(
 
   return { totalCost, stepCount };
 }
+
+/**
+ * Log the text content of an assistant message.
+ * Intended as the onAssistantMessage callback for trackQuery.
+ *
+ * @param message - Assistant message from the query stream
+ */
+export function logAssistantText(message: any): void {
+  const textContent = message.message.content.find(
+    (c: unknown) => (c as { type: string }).type === "text"
+  );
+  if (textContent && "text" in (textContent as { text?: string })) {
+    console.log((textContent as { text: string }).text);
+  }
+}
+
+/**
+ * Log the total cost and step count of a completed query.
+ *
+ * @param result - Result returned by trackQuery
+ */
+export function logTotalCost({ totalCost, stepCount }: QueryTrackerResult): void {
+  console.log(`\n💰 Total cost: $${totalCost.toFixed(4)} (${stepCount} steps)`);
+}